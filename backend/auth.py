@@ -1,9 +1,22 @@
 import jwt
+import threading
+import time
+from collections import OrderedDict
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Optional, Tuple
 
 SECRET_KEY = "JWT_SECRET"
 ALGORITHM = "HS256"
+TOKEN_CACHE_SIZE = 4096
+# Past this many, the oldest revocations are forgotten and those tokens work
+# again until they expire; all tokens live 7 days, so oldest = expires soonest
+REVOKED_TOKENS_SIZE = 4096
+
+# token -> (username, exp) for tokens that already passed jwt.decode
+_verified_tokens: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+# token -> exp for logged-out tokens; kept only until they would expire anyway
+_revoked_tokens: "OrderedDict[str, float]" = OrderedDict()
+_lock = threading.Lock()
 
 
 def create_token(username: str) -> dict:
@@ -15,8 +28,49 @@ def create_token(username: str) -> dict:
 
 
 def verify_token(token: str) -> Optional[str]:
+    now = time.time()
+    with _lock:
+        if token in _revoked_tokens:
+            return None
+        cached = _verified_tokens.get(token)
+        if cached is not None:
+            username, exp = cached
+            if exp > now:
+                _verified_tokens.move_to_end(token)
+                return username
+            del _verified_tokens[token]
+
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        return payload["username"]
+        username = payload["username"]
+        exp = payload.get("exp")
     except:
         return None
+
+    with _lock:
+        if token in _revoked_tokens:
+            return None
+        if exp is None:
+            return username  # Nothing to bound a cache entry by
+        _verified_tokens[token] = (username, float(exp))
+        while len(_verified_tokens) > TOKEN_CACHE_SIZE:
+            _verified_tokens.popitem(last=False)
+    return username
+
+
+def revoke_token(token: str):
+    try:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        # A token without exp never expires, so neither may its revocation
+        exp = float(payload.get("exp", float("inf")))
+    except:
+        return  # Invalid or expired tokens are rejected already
+
+    now = time.time()
+    with _lock:
+        for expired in [t for t, until in _revoked_tokens.items() if until <= now]:
+            del _revoked_tokens[expired]
+        _revoked_tokens[token] = exp
+        while len(_revoked_tokens) > REVOKED_TOKENS_SIZE:
+            _revoked_tokens.popitem(last=False)
+        _verified_tokens.pop(token, None)
@@ -0,0 +1,63 @@
+import hashlib
+import os
+import re
+import time
+from typing import Dict, List, Optional
+
+from .tracing import Trace, current_trace, jsonl_writer
+
+# Opt-in: set CAPTURE_FILE to record /chat and /chats traffic for backend.replay
+CAPTURE_FILE = os.environ.get("CAPTURE_FILE")
+
+_EMAIL = re.compile(r"[\w.+-]+@[\w-]+\.[\w.-]+")
+# At least 10 digits, with at most two separators between them
+_PHONE = re.compile(r"(?<![\w.-])\+?\(?\d(?:[\s().-]{0,2}\d){9,}(?!\w)")
+# Travel dates are the main input, so never scrub something containing one
+_DATE = re.compile(r"\d{4}-\d{1,2}-\d{1,2}|\d{1,2}[/.]\d{1,2}[/.]\d{2,4}")
+
+
+def pseudonym(username: str) -> str:
+    return "user-" + hashlib.sha256(username.encode()).hexdigest()[:10]
+
+
+def _phone(match: re.Match) -> str:
+    return match.group() if _DATE.search(match.group()) else "<phone>"
+
+
+def scrub(text: str) -> str:
+    return _PHONE.sub(_phone, _EMAIL.sub("<email>", text))
+
+
+def sanitize_messages(messages: Optional[List[Dict[str, str]]]) -> List[Dict]:
+    return [
+        {**m, "content": scrub(m["content"])} if "content" in m else dict(m)
+        for m in messages or []
+    ]
+
+
+def record(endpoint: str, payload: Dict, output: Dict):
+    """Queue one request for the capture file; a no-op unless capture is on.
+
+    The entry is written by ``flush`` once the middleware has timed the whole
+    request, so its latency matches the Server-Timing header that replay reads.
+    """
+    if not CAPTURE_FILE:
+        return
+    trace = current_trace.get()
+    if trace is not None:
+        trace.capture = {"endpoint": endpoint, "payload": payload, "output": output}
+
+
+def flush(trace: Trace, elapsed_ms: float):
+    if not CAPTURE_FILE or trace.capture is None:
+        return
+    entry = {
+        "ts": time.time() - elapsed_ms / 1000,
+        "request_id": trace.request_id,
+        "endpoint": trace.capture["endpoint"],
+        "payload": trace.capture["payload"],
+        "latency_ms": round(elapsed_ms, 2),
+        "stages": trace.breakdown(),
+        "output": trace.capture["output"],
+    }
+    jsonl_writer.write(CAPTURE_FILE, entry)
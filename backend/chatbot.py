@@ -1,6 +1,7 @@
-import ollama
-from typing import Dict, List
+from typing import Dict, List, Optional
 from datetime import datetime
+from .ollama_pool import pool
+from .tracing import span
 
 
 class TravelContext:
@@ -40,42 +41,55 @@ session_contexts: Dict[str, TravelContext] = {}
 
 
 def generate_response(
-    session_id: str, user_input: str, message_history: List[Dict[str, str]] = None
+    session_id: str,
+    user_input: str,
+    message_history: List[Dict[str, str]] = None,
+    chat_id: Optional[int] = None,
 ) -> str:
     try:
-        if session_id not in session_contexts:
-            session_contexts[session_id] = TravelContext()
+        session = session_contexts.setdefault(session_id, TravelContext())
 
         print("MESSAGE HS, \n", message_history)
-        context = session_contexts[session_id]
-        context.clear_messages()
+        # Requests run concurrently in the threadpool (e.g. two tabs of one
+        # user), so build the message list per call and only share the info
+        context = TravelContext()
+        context.info = session.info
 
         # Use sorted message history
         if message_history:
-            # Sort messages by timestamp if present
-            sorted_history = (
-                sorted(message_history, key=lambda x: x.get("timestamp", ""))
-                if all("timestamp" in msg for msg in message_history)
-                else message_history
-            )
+            with span("sort_history"):
+                # Sort messages by timestamp if present
+                sorted_history = (
+                    sorted(message_history, key=lambda x: x.get("timestamp", ""))
+                    if all("timestamp" in msg for msg in message_history)
+                    else message_history
+                )
 
-            for msg in sorted_history:
-                context.add_message(msg["role"], msg["content"])
+                for msg in sorted_history:
+                    context.add_message(msg["role"], msg["content"])
 
         context.add_message("user", user_input)
-        prompt = create_travel_prompt(context)
-
-        response = ollama.chat(
-            model="llama2",
-            messages=[
-                {"role": "system", "content": prompt},
-                *[
-                    {"role": m["role"], "content": m["content"]}
-                    for m in context.messages
+        with span("create_travel_prompt"):
+            prompt = create_travel_prompt(context)
+
+        # Clarifying questions are short, so hedge them against a slow backend.
+        # Nothing fills context.info yet, so for now this is every request.
+        with span("ollama"):
+            # Keep each conversation on one server so its prompt prefix stays
+            # cached there; a new chat has no id yet and is routed by load
+            response = pool.chat(
+                f"{session_id}:{chat_id}" if chat_id else f"{session_id}:new",
+                hedge=bool(context.get_missing_info()),
+                model="llama2",
+                messages=[
+                    {"role": "system", "content": prompt},
+                    *[
+                        {"role": m["role"], "content": m["content"]}
+                        for m in context.messages
+                    ],
                 ],
-            ],
-            stream=False,
-        )
+                stream=False,
+            )
 
         assistant_response = response["message"]["content"].strip()
         context.add_message("assistant", assistant_response)
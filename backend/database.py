@@ -2,6 +2,7 @@ import sqlite3
 from datetime import datetime
 import time
 from contextlib import contextmanager
+from .tracing import traced
 
 
 @contextmanager
@@ -79,6 +80,7 @@ __all__ = [
 ]
 
 
+@traced("db.register_user")
 def register_user(username: str, password: str) -> bool:
     try:
         with get_connection() as conn:
@@ -93,6 +95,7 @@ def register_user(username: str, password: str) -> bool:
         return False
 
 
+@traced("db.authenticate_user")
 def authenticate_user(username: str, password: str) -> bool:
     with get_connection() as conn:
         cursor = conn.cursor()
@@ -101,6 +104,7 @@ def authenticate_user(username: str, password: str) -> bool:
         return row is not None and row[0] == password
 
 
+@traced("db.save_chat")
 def save_chat(username: str, title: str, user_input: str, bot_response: str) -> int:
     with get_connection() as conn:
         cursor = conn.cursor()
@@ -116,6 +120,7 @@ def save_chat(username: str, title: str, user_input: str, bot_response: str) ->
         return chat_id
 
 
+@traced("db.add_message_to_chat")
 def add_message_to_chat(chat_id: int, user_input: str, bot_response: str):
     with get_connection() as conn:
         cursor = conn.cursor()
@@ -126,6 +131,7 @@ def add_message_to_chat(chat_id: int, user_input: str, bot_response: str):
         conn.commit()
 
 
+@traced("db.get_user_chats")
 def get_user_chats(username: str):
     with get_connection() as conn:
         cursor = conn.cursor()
@@ -0,0 +1,130 @@
+"""Minimal stand-in for an Ollama server, for exercising the backend pool locally.
+
+Start a few of them and point the backend at them:
+
+    python -m backend.fake_ollama --port 11435 --delay 0.5 &
+    python -m backend.fake_ollama --port 11436 --delay 2 --fail-rate 0.2 &
+    OLLAMA_HOSTS=http://127.0.0.1:11435,http://127.0.0.1:11436 uvicorn backend.main:app
+
+With ``--responses capture.jsonl`` it answers with the replies recorded by
+CAPTURE_FILE, matched on the latest user message, for use with backend.replay.
+"""
+
+import argparse
+import json
+import random
+import time
+from collections import defaultdict, deque
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class FakeOllamaHandler(BaseHTTPRequestHandler):
+    delay = 0.0
+    fail_rate = 0.0
+    models = ("llama2",)
+    # user message -> recorded replies, served in recorded order
+    recorded = {}
+
+    def _send_json(self, status: int, body: dict):
+        data = json.dumps(body).encode()
+        try:
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # The client gave up waiting, e.g. its timeout ran out
+
+    def do_GET(self):
+        if self.path == "/api/tags":
+            self._send_json(
+                200,
+                {
+                    "models": [
+                        {"name": f"{m}:latest", "model": f"{m}:latest"}
+                        for m in self.models
+                    ]
+                },
+            )
+        elif self.path == "/":
+            self._send_json(200, {"status": "Ollama is running"})
+        else:
+            self._send_json(404, {"error": "not found"})
+
+    def do_POST(self):
+        if self.path != "/api/chat":
+            self._send_json(404, {"error": "not found"})
+            return
+
+        length = int(self.headers.get("Content-Length", 0))
+        request = json.loads(self.rfile.read(length) or b"{}")
+        model = request.get("model", "llama2")
+        if model.split(":")[0] not in self.models:
+            self._send_json(404, {"error": f"model '{model}' not found"})
+            return
+        time.sleep(self.delay)
+        if random.random() < self.fail_rate:
+            self._send_json(500, {"error": "simulated failure"})
+            return
+
+        messages = request.get("messages", [])
+        last_user = next(
+            (m["content"] for m in reversed(messages) if m.get("role") == "user"), ""
+        )
+        replies = self.recorded.get(last_user)
+        if replies:
+            content = replies.popleft() if len(replies) > 1 else replies[0]
+        else:
+            content = (
+                f"[fake-ollama:{self.server.server_port}] You said: {last_user[:200]}"
+            )
+        self._send_json(
+            200,
+            {
+                "model": model,
+                "created_at": datetime.now(timezone.utc).isoformat(),
+                "message": {"role": "assistant", "content": content},
+                "done": True,
+            },
+        )
+
+    def log_message(self, format, *args):
+        pass
+
+
+def load_recorded(path: str) -> dict:
+    recorded = defaultdict(deque)
+    with open(path) as f:
+        for line in f:
+            entry = json.loads(line) if line.strip() else None
+            if entry and entry["endpoint"] == "/chat":
+                recorded[entry["payload"]["message"]].append(
+                    entry["output"]["response"]
+                )
+    return dict(recorded)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11435)
+    parser.add_argument("--delay", type=float, default=0.0, help="seconds per reply")
+    parser.add_argument(
+        "--fail-rate", type=float, default=0.0, help="fraction of chats that 500"
+    )
+    parser.add_argument("--responses", help="capture file with replies to serve")
+    args = parser.parse_args()
+
+    FakeOllamaHandler.delay = args.delay
+    FakeOllamaHandler.fail_rate = args.fail_rate
+    if args.responses:
+        FakeOllamaHandler.recorded = load_recorded(args.responses)
+    server = ThreadingHTTPServer((args.host, args.port), FakeOllamaHandler)
+    print(f"Fake Ollama listening on http://{args.host}:{args.port}")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,22 @@
 # backend/main.py
-from fastapi import FastAPI, Depends, HTTPException
+import os
+from fastapi import FastAPI, Depends, HTTPException, Request
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from .auth import create_token, verify_token
+from .auth import create_token, revoke_token, verify_token
 from pydantic import BaseModel
 from typing import Dict, List, Optional
+from . import capture
 from .chatbot import generate_response
+from .ollama_pool import pool
+from .tracing import (
+    Trace,
+    current_trace,
+    log_if_slow,
+    profiled,
+    profiling,
+    request_id_from,
+    span,
+)
 from .database import (
     init_db,
     register_user,
@@ -17,6 +29,9 @@ from .database import (
 app = FastAPI()
 security = HTTPBearer()
 
+# Usernames allowed to use the /admin endpoints
+ADMIN_USERS = {u for u in os.environ.get("ADMIN_USERS", "").split(",") if u}
+
 
 class UserCredentials(BaseModel):
     username: str
@@ -31,12 +46,44 @@ class ChatMessage(BaseModel):
     messages: Optional[List[Dict[str, str]]] = []  # Add this field
 
 
+class ProfileRequest(BaseModel):
+    count: int = 1
+    mode: str = "cprofile"
+
+
+@app.middleware("http")
+async def trace_requests(request: Request, call_next):
+    request_id = request_id_from(request.headers.get("X-Request-ID"))
+    trace = Trace(request_id, request.method, request.url.path)
+    token = current_trace.set(trace)
+    # Unhandled errors become a 500 further out; log them as such
+    status_code = 500
+    try:
+        mode = profiling.claim()
+        if mode:
+            with profiling.profile(trace, mode):
+                response = await call_next(request)
+        else:
+            response = await call_next(request)
+        status_code = response.status_code
+    finally:
+        current_trace.reset(token)
+        log_if_slow(trace, status_code)
+    elapsed_ms = trace.elapsed_ms()
+    response.headers["X-Request-ID"] = request_id
+    response.headers["Server-Timing"] = f"app;dur={elapsed_ms:.2f}"
+    capture.flush(trace, elapsed_ms)
+    return response
+
+
 @app.on_event("startup")
 def startup_event():
     init_db()
+    pool.start_health_checks()
 
 
 @app.post("/register")
+@profiled
 def register(credentials: UserCredentials):
     if not credentials.username or not credentials.password:
         raise HTTPException(status_code=400, detail="Username and password required")
@@ -57,35 +104,70 @@ def register(credentials: UserCredentials):
 
 
 @app.post("/login")
+@profiled
 def login(credentials: UserCredentials):
     if authenticate_user(credentials.username, credentials.password):
         return create_token(credentials.username)
     raise HTTPException(status_code=401)
 
 
+@profiled
 def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
     token = credentials.credentials
-    username = verify_token(token)
+    with span("verify_token"):
+        username = verify_token(token)
     if not username:
         raise HTTPException(status_code=401, detail="Invalid token")
     return username
 
 
 @app.post("/verify")
+@profiled
 def verify(username: str = Depends(get_current_user)):
     return {"username": username}
 
 
+@app.post("/logout")
+@profiled
+def logout(credentials: HTTPAuthorizationCredentials = Depends(security)):
+    revoke_token(credentials.credentials)
+    return {"message": "Logged out"}
+
+
+def get_admin_user(username: str = Depends(get_current_user)):
+    if username not in ADMIN_USERS:
+        raise HTTPException(status_code=403)
+    return username
+
+
+@app.post("/admin/profile")
+@profiled
+def profile_next_requests(
+    request: ProfileRequest, admin: str = Depends(get_admin_user)
+):
+    if request.count < 0:
+        raise HTTPException(status_code=400, detail="count must not be negative")
+    try:
+        profiling.arm(request.count, request.mode)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"remaining": request.count, "mode": request.mode}
+
+
 @app.post("/chat")
-async def chat(message: ChatMessage, current_user: str = Depends(get_current_user)):
+@profiled
+def chat(message: ChatMessage, current_user: str = Depends(get_current_user)):
     if message.username != current_user:
         raise HTTPException(status_code=403)
 
+    incoming_chat_id = message.chat_id
+
     # Pass full message history to generate_response
     response = generate_response(
         session_id=message.username,
         user_input=message.message,
         message_history=message.messages,
+        chat_id=message.chat_id,
     )
 
     if message.chat_id:
@@ -94,11 +176,29 @@ async def chat(message: ChatMessage, current_user: str = Depends(get_current_use
         title = message.title or message.message[:30] + "..."
         message.chat_id = save_chat(message.username, title, message.message, response)
 
+    capture.record(
+        "/chat",
+        {
+            "username": capture.pseudonym(message.username),
+            "chat_id": incoming_chat_id,
+            "message": capture.scrub(message.message),
+            "title": capture.scrub(message.title) if message.title else None,
+            "messages": capture.sanitize_messages(message.messages),
+        },
+        {"response": capture.scrub(response), "chat_id": message.chat_id},
+    )
     return {"response": response, "chat_id": message.chat_id}
 
 
 @app.get("/chats/{username}")
+@profiled
 def get_chats(username: str, current_user: str = Depends(get_current_user)):
     if username != current_user:
         raise HTTPException(status_code=403)
-    return get_user_chats(username)
+    chats = get_user_chats(username)
+    capture.record(
+        "/chats/{username}",
+        {"username": capture.pseudonym(username)},
+        {"chats": len(chats)},
+    )
+    return chats
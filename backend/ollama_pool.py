@@ -0,0 +1,257 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Dict, List, Optional, Set, Tuple
+
+import httpx
+import ollama
+
+# Comma separated list of Ollama servers, each optionally with its own request
+# timeout in seconds, e.g.
+# OLLAMA_HOSTS=http://127.0.0.1:11434=60,http://127.0.0.1:11435
+OLLAMA_HOSTS = os.environ.get(
+    "OLLAMA_HOSTS", os.environ.get("OLLAMA_HOST", "http://127.0.0.1:11434")
+)
+# Timeout for hosts that do not set their own
+REQUEST_TIMEOUT = float(os.environ.get("OLLAMA_TIMEOUT", "120"))
+HEALTH_TIMEOUT = float(os.environ.get("OLLAMA_HEALTH_TIMEOUT", "2"))
+HEALTH_INTERVAL = float(os.environ.get("OLLAMA_HEALTH_INTERVAL", "10"))
+EJECT_SECONDS = float(os.environ.get("OLLAMA_EJECT_SECONDS", "30"))
+# Seconds to wait on the first endpoint before racing a second one. Off by
+# default: a hedged request can cost two generations.
+HEDGE_DELAY = float(os.environ.get("OLLAMA_HEDGE_DELAY", "0"))
+# Most Ollama calls the pool runs at once, across all endpoints. Calls beyond
+# this wait for a free worker (they still count towards their endpoint's load).
+MAX_CONCURRENCY = int(os.environ.get("OLLAMA_MAX_CONCURRENCY", "32"))
+# How many more in-flight requests a sticky endpoint may have than the
+# least-loaded one before a chat is moved elsewhere
+AFFINITY_SLACK = 2
+MAX_AFFINITY_ENTRIES = 1024
+
+
+def is_endpoint_failure(error: Exception) -> bool:
+    """True for errors that say the server is in trouble rather than the request."""
+    if isinstance(error, ollama.ResponseError):
+        return error.status_code >= 500
+    return isinstance(error, (ConnectionError, httpx.TransportError))
+
+
+def parse_host(spec: str, default_timeout: float) -> Tuple[str, float]:
+    """Split ``http://host:port=60`` into the host and its timeout."""
+    host, sep, timeout = spec.strip().rpartition("=")
+    if not sep:
+        return timeout, default_timeout
+    return host, float(timeout)
+
+
+def is_model_missing(error: Exception) -> bool:
+    """True when this host lacks the model; another host may still have it."""
+    return isinstance(error, ollama.ResponseError) and error.status_code == 404
+
+
+def model_name(name: str) -> str:
+    return name if ":" in name else f"{name}:latest"
+
+
+class Endpoint:
+    def __init__(self, host: str, timeout: float):
+        self.host = host
+        self.timeout = timeout
+        self.client = ollama.Client(host=host, timeout=timeout)
+        self.probe = ollama.Client(host=host, timeout=HEALTH_TIMEOUT)
+        self.in_flight = 0
+        self.healthy = True
+        self.ejected_until = 0.0
+        # Models listed by the last health probe; None until one succeeds
+        self.models: Optional[Set[str]] = None
+
+    def available(self) -> bool:
+        return self.healthy and time.monotonic() >= self.ejected_until
+
+
+class OllamaPool:
+    """Routes chat calls across several Ollama servers.
+
+    Each chat (``affinity_key``) sticks to the endpoint that last served it,
+    so prompt-context reuse on that server stays warm, unless that endpoint is
+    unhealthy or noticeably busier than the least-loaded one.  Failed
+    endpoints are ejected for a while and the request is retried on the next.
+    """
+
+    def __init__(
+        self,
+        hosts: List[str],
+        timeout: float = REQUEST_TIMEOUT,
+        hedge_delay: float = HEDGE_DELAY,
+        eject_seconds: float = EJECT_SECONDS,
+        max_concurrency: int = MAX_CONCURRENCY,
+    ):
+        if not hosts:
+            raise ValueError("At least one Ollama host is required")
+        self.endpoints = [Endpoint(*parse_host(spec, timeout)) for spec in hosts]
+        self.hedge_delay = hedge_delay
+        self.eject_seconds = eject_seconds
+        self._affinity: "OrderedDict[str, Endpoint]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_concurrency,
+            thread_name_prefix="ollama-pool",
+        )
+        self._health_thread: Optional[threading.Thread] = None
+
+    def _acquire(
+        self, affinity_key: str, tried: Set[Endpoint], model: Optional[str]
+    ) -> Optional[Endpoint]:
+        with self._lock:
+            remaining = [e for e in self.endpoints if e not in tried]
+            if model:
+                wanted = model_name(model)
+                serving = [
+                    e for e in remaining if e.models is None or wanted in e.models
+                ]
+                # If no host lists it, let one of them report the error
+                remaining = serving or remaining
+            candidates = [e for e in remaining if e.available()]
+            if not candidates:
+                # Everything is ejected: better to try than to fail outright
+                candidates = remaining
+            if not candidates:
+                return None
+
+            least_loaded = min(candidates, key=lambda e: e.in_flight)
+            sticky = self._affinity.get(affinity_key)
+            if (
+                sticky in candidates
+                and sticky.in_flight <= least_loaded.in_flight + AFFINITY_SLACK
+            ):
+                endpoint = sticky
+            else:
+                endpoint = least_loaded
+            endpoint.in_flight += 1
+            return endpoint
+
+    def _remember(self, affinity_key: str, endpoint: Endpoint):
+        with self._lock:
+            self._affinity[affinity_key] = endpoint
+            self._affinity.move_to_end(affinity_key)
+            while len(self._affinity) > MAX_AFFINITY_ENTRIES:
+                self._affinity.popitem(last=False)
+
+    def _call(self, endpoint: Endpoint, kwargs: Dict, started: threading.Event):
+        started.set()
+        try:
+            return endpoint.client.chat(**kwargs)
+        except Exception as e:
+            if is_endpoint_failure(e):
+                with self._lock:
+                    endpoint.ejected_until = time.monotonic() + self.eject_seconds
+            raise
+        finally:
+            with self._lock:
+                endpoint.in_flight -= 1
+
+    def _submit(self, affinity_key: str, tried: Set[Endpoint], pending: Dict, kwargs):
+        endpoint = self._acquire(affinity_key, tried, kwargs.get("model"))
+        if endpoint is None:
+            return False
+        tried.add(endpoint)
+        started = threading.Event()
+        future = self._executor.submit(self._call, endpoint, kwargs, started)
+        pending[future] = (endpoint, started)
+        return True
+
+    def chat(self, affinity_key: str, hedge: bool = False, **kwargs):
+        """Same arguments as ``ollama.chat``.
+
+        With ``hedge`` set, a second endpoint is raced against the first
+        once ``hedge_delay`` has passed without an answer.
+        """
+        tried: Set[Endpoint] = set()
+        pending: Dict = {}
+        hedged = False
+        last_error: Optional[Exception] = None
+
+        while True:
+            if not pending and not self._submit(affinity_key, tried, pending, kwargs):
+                break
+
+            hedging = hedge and not hedged and self.hedge_delay > 0
+            if hedging:
+                # Time the hedge from when the call runs, not while it waits
+                # for a worker; a hedge would only queue behind it
+                for _, started in pending.values():
+                    started.wait()
+            done, _ = wait(
+                pending,
+                timeout=self.hedge_delay if hedging else None,
+                return_when=FIRST_COMPLETED,
+            )
+            if not done:
+                hedged = True
+                self._submit(affinity_key, tried, pending, kwargs)
+                continue
+
+            for future in done:
+                endpoint, _ = pending.pop(future)
+                try:
+                    response = future.result()
+                except Exception as e:
+                    if not (is_endpoint_failure(e) or is_model_missing(e)):
+                        # A bad request: every endpoint would say the same
+                        raise
+                    print(f"Ollama endpoint {endpoint.host} failed: {e}")
+                    last_error = e
+                    continue
+                self._remember(affinity_key, endpoint)
+                return response
+
+        raise last_error or RuntimeError("No Ollama endpoints available")
+
+    def check_health(self):
+        for endpoint in self.endpoints:
+            models = None
+            try:
+                listed = endpoint.probe.list()["models"]
+                # Newer clients expose "model", older ones "name"
+                models = {model_name(m.get("model") or m.get("name")) for m in listed}
+                healthy = True
+            except Exception:
+                healthy = False
+            # A passing probe does not end an ejection: /api/tags can answer
+            # while /api/chat keeps failing
+            with self._lock:
+                endpoint.healthy = healthy
+                if models is not None:
+                    endpoint.models = models
+
+    def start_health_checks(self, interval: float = HEALTH_INTERVAL):
+        if self._health_thread is not None:
+            return
+
+        def run():
+            while True:
+                self.check_health()
+                time.sleep(interval)
+
+        self._health_thread = threading.Thread(
+            target=run, name="ollama-health", daemon=True
+        )
+        self._health_thread.start()
+
+    def status(self) -> List[Dict]:
+        with self._lock:
+            return [
+                {
+                    "host": e.host,
+                    "timeout": e.timeout,
+                    "healthy": e.healthy,
+                    "available": e.available(),
+                    "in_flight": e.in_flight,
+                }
+                for e in self.endpoints
+            ]
+
+
+pool = OllamaPool([h.strip() for h in OLLAMA_HOSTS.split(",") if h.strip()])
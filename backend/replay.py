@@ -0,0 +1,218 @@
+"""Re-drive traffic recorded with CAPTURE_FILE against a running backend.
+
+    python -m backend.replay capture.jsonl --url http://127.0.0.1:8000 --speed max
+
+Point the backend at fake Ollama servers (optionally serving the recorded
+answers with ``python -m backend.fake_ollama --responses capture.jsonl``) so
+that latency changes come from the backend rather than the model.
+"""
+
+import argparse
+import difflib
+import json
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+import requests
+
+REPLAY_PASSWORD = "replay-pass"
+
+
+def load_records(path: str) -> List[Dict]:
+    with open(path) as f:
+        records = [json.loads(line) for line in f if line.strip()]
+    return sorted(records, key=lambda r: r["ts"])
+
+
+def percentile(values: List[float], pct: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered)) - 1))
+    return round(ordered[index], 2)
+
+
+def login(url: str, username: str) -> str:
+    # Registration fails harmlessly when an earlier replay created the user
+    requests.post(
+        f"{url}/register", json={"username": username, "password": REPLAY_PASSWORD}
+    )
+    response = requests.post(
+        f"{url}/login", json={"username": username, "password": REPLAY_PASSWORD}
+    )
+    response.raise_for_status()
+    return response.json()["access_token"]
+
+
+def server_ms(response) -> Optional[float]:
+    # The backend reports its own time as "Server-Timing: app;dur=<ms>"
+    for metric in response.headers.get("Server-Timing", "").split(","):
+        name, _, params = metric.strip().partition(";")
+        if name == "app" and params.startswith("dur="):
+            return float(params[4:])
+    return None
+
+
+def replay_headers(token: str, record: Dict) -> Dict:
+    headers = {"Authorization": f"Bearer {token}"}
+    # Reuse the recorded id so replayed requests can be found in slow_requests.log
+    if record.get("request_id"):
+        headers["X-Request-ID"] = record["request_id"]
+    return headers
+
+
+def replay_user(
+    url: str,
+    token: str,
+    records: List[Dict],
+    start: float,
+    first_ts: float,
+    speed: float,
+    results: List[Dict],
+):
+    # Recorded chat ids -> ids created by this replay
+    chat_ids: Dict[int, int] = {}
+
+    for record in records:
+        if speed > 0:
+            delay = start + (record["ts"] - first_ts) / speed - time.time()
+            if delay > 0:
+                time.sleep(delay)
+
+        payload = record["payload"]
+        headers = replay_headers(token, record)
+        sent = time.perf_counter()
+        replay_ms = None
+        try:
+            if record["endpoint"] == "/chat":
+                body = {**payload, "chat_id": chat_ids.get(payload["chat_id"])}
+                response = requests.post(f"{url}/chat", json=body, headers=headers)
+            else:
+                response = requests.get(
+                    f"{url}/chats/{payload['username']}", headers=headers
+                )
+            status = response.status_code
+            output = response.json() if status == 200 else None
+            replay_ms = server_ms(response)
+        except Exception as e:
+            status, output = None, {"error": str(e)}
+        round_trip_ms = (time.perf_counter() - sent) * 1000
+
+        if record["endpoint"] == "/chat" and status == 200:
+            chat_ids[record["output"]["chat_id"]] = output["chat_id"]
+        if record["endpoint"] != "/chat" and status == 200:
+            output = {"chats": len(output)}
+
+        results.append(
+            {
+                "endpoint": record["endpoint"],
+                "request_id": record.get("request_id"),
+                "status": status,
+                # Both measured server side by the tracing middleware
+                "recorded_ms": record["latency_ms"],
+                "replay_ms": replay_ms,
+                "round_trip_ms": round(round_trip_ms, 2),
+                "recorded_output": record["output"],
+                "replay_output": output,
+            }
+        )
+
+
+def replay(url: str, records: List[Dict], speed: float) -> List[Dict]:
+    by_user: Dict[str, List[Dict]] = defaultdict(list)
+    for record in records:
+        by_user[record["payload"]["username"]].append(record)
+    tokens = {username: login(url, username) for username in by_user}
+
+    # Each user replays in order on its own thread; users run concurrently
+    results: List[Dict] = []
+    start = time.time()
+    first_ts = records[0]["ts"]
+    threads = [
+        threading.Thread(
+            target=replay_user,
+            args=(url, tokens[u], recs, start, first_ts, speed, results),
+        )
+        for u, recs in by_user.items()
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def report(results: List[Dict], show_diffs: int):
+    by_endpoint: Dict[str, List[Dict]] = defaultdict(list)
+    for result in results:
+        by_endpoint[result["endpoint"]].append(result)
+
+    print("Latencies are server side unless marked round trip (client view).\n")
+    print(f"{'endpoint':<20}{'n':>6}{'errors':>8}")
+    for endpoint, rows in sorted(by_endpoint.items()):
+        errors = sum(1 for r in rows if r["status"] != 200)
+        print(f"{endpoint:<20}{len(rows):>6}{errors:>8}")
+        for label, key in (
+            ("recorded", "recorded_ms"),
+            ("replay", "replay_ms"),
+            ("round trip", "round_trip_ms"),
+        ):
+            values = [r[key] for r in rows if r[key] is not None]
+            stats = "  ".join(f"p{p}={percentile(values, p)}" for p in (50, 90, 99))
+            print(f"  {label:<12}{stats}  max={max(values, default=None)} (ms)")
+
+    chats = [r for r in by_endpoint.get("/chat", []) if r["status"] == 200]
+    changed = [
+        r
+        for r in chats
+        if r["recorded_output"]["response"] != r["replay_output"]["response"]
+    ]
+    print(
+        f"\n/chat responses differing from the recording: {len(changed)}/{len(chats)}"
+    )
+    for r in changed[:show_diffs]:
+        print(f"\n--- request {r['request_id']}")
+        diff = difflib.unified_diff(
+            r["recorded_output"]["response"].splitlines(),
+            r["replay_output"]["response"].splitlines(),
+            "recorded",
+            "replay",
+            lineterm="",
+        )
+        print("\n".join(diff))
+
+
+def parse_speed(value: str) -> float:
+    return 0.0 if value == "max" else float(value)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("capture", help="JSONL file written via CAPTURE_FILE")
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument(
+        "--speed",
+        type=parse_speed,
+        default=1.0,
+        help="time scale relative to the recording (2 = twice as fast), or 'max'",
+    )
+    parser.add_argument("--output", help="write per-request results as JSONL")
+    parser.add_argument("--show-diffs", type=int, default=5)
+    args = parser.parse_args()
+
+    records = load_records(args.capture)
+    if not records:
+        parser.error("capture file is empty")
+    results = replay(args.url, records, args.speed)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            for result in results:
+                f.write(json.dumps(result) + "\n")
+    report(results, args.show_diffs)
+
+
+if __name__ == "__main__":
+    main()
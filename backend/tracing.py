@@ -0,0 +1,270 @@
+import cProfile
+import itertools
+import json
+import os
+import queue
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from functools import wraps
+from typing import Dict, List, Optional
+
+SLOW_REQUEST_MS = float(os.environ.get("SLOW_REQUEST_MS", "1000"))
+SLOW_REQUEST_LOG = os.environ.get("SLOW_REQUEST_LOG", "slow_requests.log")
+PROFILE_DIR = os.environ.get("PROFILE_DIR", "profiles")
+SAMPLE_INTERVAL = 0.005
+
+_REQUEST_ID = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+
+class Trace:
+    def __init__(self, request_id: str, method: str, path: str):
+        self.request_id = request_id
+        self.method = method
+        self.path = path
+        self.start = time.perf_counter()
+        self.spans: List[Dict] = []
+        self.profiler: Optional[cProfile.Profile] = None
+        # Set by capture.record, written out once the request is timed
+        self.capture: Optional[Dict] = None
+
+    def add(self, name: str, start: float, end: float):
+        self.spans.append(
+            {
+                "name": name,
+                "start_ms": round((start - self.start) * 1000, 2),
+                "duration_ms": round((end - start) * 1000, 2),
+            }
+        )
+
+    def elapsed_ms(self) -> float:
+        return (time.perf_counter() - self.start) * 1000
+
+    def breakdown(self) -> Dict[str, float]:
+        stages: Dict[str, float] = {}
+        for s in self.spans:
+            stages[s["name"]] = round(stages.get(s["name"], 0) + s["duration_ms"], 2)
+        return stages
+
+
+current_trace: ContextVar[Optional[Trace]] = ContextVar("current_trace", default=None)
+
+
+def request_id_from(header: Optional[str]) -> str:
+    # Client ids end up in profile file names, so only accept plain tokens
+    if header and _REQUEST_ID.match(header):
+        return header
+    return uuid.uuid4().hex
+
+
+@contextmanager
+def span(name: str):
+    """Time a stage of the current request; a no-op outside of a request."""
+    trace = current_trace.get()
+    if trace is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        trace.add(name, start, time.perf_counter())
+
+
+def traced(name: str):
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def profiled(func):
+    """Run ``func`` under the request's cProfile session, if it has one.
+
+    FastAPI runs sync handlers and dependencies in threadpool workers, and a
+    profiler only sees the thread it was enabled in, so it is switched on here
+    rather than in the middleware.
+    """
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        trace = current_trace.get()
+        if trace is None or trace.profiler is None or sys.getprofile() is not None:
+            return func(*args, **kwargs)
+        trace.profiler.enable()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            trace.profiler.disable()
+
+    return wrapper
+
+
+class JsonlWriter:
+    """Appends JSON lines from a background thread, so requests never wait
+    on the disk from the event loop."""
+
+    def __init__(self):
+        self._queue: queue.Queue = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+
+    def write(self, path: str, entry: Dict):
+        if self._thread is None:
+            with self._start_lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(
+                        target=self._run, name="jsonl-writer", daemon=True
+                    )
+                    self._thread.start()
+        self._queue.put((path, entry))
+
+    def _run(self):
+        while True:
+            path, entry = self._queue.get()
+            try:
+                with open(path, "a") as f:
+                    f.write(json.dumps(entry) + "\n")
+            except Exception as e:
+                print(f"Could not write to {path}: {e}")
+            finally:
+                self._queue.task_done()
+
+    def flush(self):
+        """Block until everything queued so far is on disk."""
+        self._queue.join()
+
+
+jsonl_writer = JsonlWriter()
+
+
+def log_if_slow(trace: Trace, status_code: int):
+    total_ms = trace.elapsed_ms()
+    if total_ms < SLOW_REQUEST_MS:
+        return
+    entry = {
+        "timestamp": datetime.utcnow().isoformat(),
+        "request_id": trace.request_id,
+        "method": trace.method,
+        "path": trace.path,
+        "status": status_code,
+        "total_ms": round(total_ms, 2),
+        "stages": trace.breakdown(),
+        "spans": trace.spans,
+    }
+    jsonl_writer.write(SLOW_REQUEST_LOG, entry)
+
+
+class SamplingProfiler:
+    """Samples the stacks of every thread, so work handed off to the
+    threadpool is seen as well as work on the event loop."""
+
+    def __init__(self, interval: float = SAMPLE_INTERVAL):
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(
+                        f"{code.co_name} ({code.co_filename}:{frame.f_lineno})"
+                    )
+                    frame = frame.f_back
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def dump(self, path: str):
+        # Collapsed-stack format, readable by flamegraph.pl / speedscope
+        with open(path, "w") as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+class ProfileToggle:
+    """Profiles the next ``remaining`` requests when switched on by an admin."""
+
+    MODES = ("cprofile", "sample")
+
+    def __init__(self):
+        self.remaining = 0
+        self.mode = "cprofile"
+        self._lock = threading.Lock()
+        # Held while a request is being profiled with cProfile
+        self._cprofile_active = threading.Lock()
+        self._sequence = itertools.count(1)
+
+    def arm(self, count: int, mode: str):
+        if mode not in self.MODES:
+            raise ValueError(f"mode must be one of {', '.join(self.MODES)}")
+        with self._lock:
+            self.remaining = count
+            self.mode = mode
+
+    def claim(self) -> Optional[str]:
+        with self._lock:
+            if self.remaining <= 0:
+                return None
+            self.remaining -= 1
+            return self.mode
+
+    def _path(self, trace: Trace, extension: str) -> str:
+        # Request ids come from clients and replays reuse them, so they alone
+        # would let a later profile overwrite an earlier one
+        stamp = datetime.utcnow().strftime("%Y%m%dT%H%M%S")
+        name = f"{trace.request_id}-{stamp}-{next(self._sequence)}.{extension}"
+        return os.path.join(PROFILE_DIR, name)
+
+    @contextmanager
+    def profile(self, trace: Trace, mode: str):
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        if mode == "cprofile":
+            # One session at a time, so concurrent requests never fight over
+            # the same thread's profile hook; a busy request gives its turn back
+            if not self._cprofile_active.acquire(blocking=False):
+                with self._lock:
+                    self.remaining += 1
+                yield
+                return
+            trace.profiler = cProfile.Profile()
+            try:
+                yield
+            finally:
+                trace.profiler.dump_stats(self._path(trace, "prof"))
+                trace.profiler = None
+                self._cprofile_active.release()
+        else:
+            sampler = SamplingProfiler()
+            sampler.start()
+            try:
+                yield
+            finally:
+                sampler.stop()
+                sampler.dump(self._path(trace, "folded"))
+
+
+profiling = ProfileToggle()
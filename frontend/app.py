@@ -3,14 +3,49 @@ import extra_streamlit_components as stx
 import requests
 import json
 import time
+import uuid
 from datetime import datetime, timedelta
 
 API_URL = "http://127.0.0.1:8000"
+# Seconds a token confirmed by /verify is trusted before asking the backend again
+VERIFY_TTL = 300
 
 st.set_page_config(page_title="Travel Planner", layout="wide")
 cookie_manager = stx.CookieManager()
 
 
+def api_headers(token: str = None) -> dict:
+    # The request id lets a slow call be matched to the backend's slow-request log
+    headers = {"X-Request-ID": uuid.uuid4().hex}
+    if token:
+        headers["Authorization"] = f"Bearer {token}"
+    return headers
+
+
+@st.cache_resource
+def verified_sessions() -> dict:
+    # Shared by every browser session: token -> (username, verified_at)
+    return {}
+
+
+def cached_username(token: str):
+    cached = verified_sessions().get(token)
+    if cached and time.time() - cached[1] < VERIFY_TTL:
+        return cached[0]
+    verified_sessions().pop(token, None)
+    return None
+
+
+def remember_session(token: str, username: str):
+    sessions = verified_sessions()
+    now = time.time()
+    # Drop stale entries so the map only holds tokens seen in the last VERIFY_TTL
+    for stale, (_, verified_at) in list(sessions.items()):
+        if now - verified_at >= VERIFY_TTL:
+            sessions.pop(stale, None)
+    sessions[token] = (username, now)
+
+
 def init_session_state():
     defaults = {
         "authenticated": False,
@@ -29,15 +64,22 @@ def init_session_state():
     # Check for existing token in cookies
     token = cookie_manager.get("auth_token")
     if token and not st.session_state.authenticated:
+        username = cached_username(token)
+        if username:
+            st.session_state.token = token
+            st.session_state.authenticated = True
+            st.session_state.username = username
+            load_chats()
+            return
+
         try:
-            response = requests.post(
-                f"{API_URL}/verify", headers={"Authorization": f"Bearer {token}"}
-            )
+            response = requests.post(f"{API_URL}/verify", headers=api_headers(token))
             if response.status_code == 200:
                 auth_data = response.json()
                 st.session_state.token = token
                 st.session_state.authenticated = True
                 st.session_state.username = auth_data["username"]
+                remember_session(token, auth_data["username"])
                 load_chats()
             else:
                 handle_logout()
@@ -48,7 +90,9 @@ def init_session_state():
 def handle_login(username: str, password: str):
     try:
         response = requests.post(
-            f"{API_URL}/login", json={"username": username, "password": password}
+            f"{API_URL}/login",
+            json={"username": username, "password": password},
+            headers=api_headers(),
         )
         if response.status_code == 200:
             auth_data = response.json()
@@ -63,6 +107,7 @@ def handle_login(username: str, password: str):
             st.session_state.token = token
             st.session_state.authenticated = True
             st.session_state.username = auth_data["username"]
+            remember_session(token, auth_data["username"])
 
             st.success("Login successful!")
             load_chats()
@@ -75,6 +120,15 @@ def handle_login(username: str, password: str):
 
 
 def handle_logout():
+    token = st.session_state.get("token") or cookie_manager.get("auth_token")
+    if token:
+        verified_sessions().pop(token, None)
+        try:
+            # Revoke server side so the token stops working everywhere
+            requests.post(f"{API_URL}/logout", headers=api_headers(token))
+        except Exception:
+            pass
+
     for key in [
         "authenticated",
         "username",
@@ -113,7 +167,7 @@ def load_chats():
         try:
             response = requests.get(
                 f"{API_URL}/chats/{st.session_state.username}",
-                headers={"Authorization": f"Bearer {st.session_state.token}"},
+                headers=api_headers(st.session_state.token),
             )
             if response.status_code == 200:
                 st.session_state.chats = response.json()
@@ -278,7 +332,7 @@ def render_chat_interface():
                             ),
                             "messages": all_messages,
                         },
-                        headers={"Authorization": f"Bearer {st.session_state.token}"},
+                        headers=api_headers(st.session_state.token),
                     )
                     if response.status_code == 200:
                         data = response.json()
@@ -332,6 +386,7 @@ def render_auth():
                 response = requests.post(
                     f"{API_URL}/register",
                     json={"username": reg_username, "password": reg_password},
+                    headers=api_headers(),
                 )
 
                 if response.status_code == 200:
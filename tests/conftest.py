@@ -0,0 +1,42 @@
+import threading
+from http.server import ThreadingHTTPServer
+
+import pytest
+
+from backend.fake_ollama import FakeOllamaHandler
+
+
+@pytest.fixture
+def fake_ollama():
+    """Starts in-process fake Ollama servers on free ports; returns their URLs."""
+    servers = []
+
+    def start(delay=0.0, fail_rate=0.0, models=("llama2",), recorded=None):
+        def do_POST(self):
+            start.chats[host] += 1
+            FakeOllamaHandler.do_POST(self)
+
+        handler = type(
+            "Handler",
+            (FakeOllamaHandler,),
+            {
+                "delay": delay,
+                "fail_rate": fail_rate,
+                "models": models,
+                "recorded": recorded or {},
+                "do_POST": do_POST,
+            },
+        )
+        server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        host = f"http://127.0.0.1:{server.server_port}"
+        start.chats[host] = 0
+        return host
+
+    # host -> number of /api/chat requests it received
+    start.chats = {}
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,88 @@
+import time
+
+import jwt
+import pytest
+
+from backend import auth
+
+
+@pytest.fixture(autouse=True)
+def empty_caches():
+    auth._verified_tokens.clear()
+    auth._revoked_tokens.clear()
+    yield
+    auth._verified_tokens.clear()
+    auth._revoked_tokens.clear()
+
+
+def token_for(username: str) -> str:
+    return auth.create_token(username)["access_token"]
+
+
+def test_verified_token_is_cached():
+    token = token_for("alice")
+
+    assert auth.verify_token(token) == "alice"
+    assert token in auth._verified_tokens
+    assert auth.verify_token(token) == "alice"
+
+
+def test_token_revoked_after_caching_is_rejected():
+    token = token_for("alice")
+    assert auth.verify_token(token) == "alice"
+
+    auth.revoke_token(token)
+
+    assert auth.verify_token(token) is None
+    assert token not in auth._verified_tokens
+
+
+def test_expired_cache_entry_is_not_served():
+    # Not a valid JWT, so only a stale cache entry could make it pass
+    auth._verified_tokens["stale"] = ("alice", time.time() - 1)
+
+    assert auth.verify_token("stale") is None
+    assert "stale" not in auth._verified_tokens
+
+
+def test_token_without_exp_is_accepted_but_not_cached():
+    token = jwt.encode({"username": "alice"}, auth.SECRET_KEY, auth.ALGORITHM)
+
+    assert auth.verify_token(token) == "alice"
+    assert token not in auth._verified_tokens
+
+    auth.revoke_token(token)
+    assert auth.verify_token(token) is None
+
+
+def test_invalid_tokens_are_rejected():
+    forged = jwt.encode({"username": "alice", "exp": time.time() + 60}, "other")
+    expired = jwt.encode(
+        {"username": "alice", "exp": time.time() - 60}, auth.SECRET_KEY, auth.ALGORITHM
+    )
+
+    assert auth.verify_token(forged) is None
+    assert auth.verify_token(expired) is None
+    assert not auth._verified_tokens
+
+
+def test_cache_evicts_least_recently_used(monkeypatch):
+    monkeypatch.setattr(auth, "TOKEN_CACHE_SIZE", 2)
+    first, second, third = (token_for(name) for name in ("ann", "bob", "cat"))
+
+    auth.verify_token(first)
+    auth.verify_token(second)
+    auth.verify_token(first)  # now most recently used
+    auth.verify_token(third)
+
+    assert list(auth._verified_tokens) == [first, third]
+
+
+def test_revocation_list_is_bounded(monkeypatch):
+    monkeypatch.setattr(auth, "REVOKED_TOKENS_SIZE", 2)
+    tokens = [token_for(name) for name in ("ann", "bob", "cat")]
+
+    for token in tokens:
+        auth.revoke_token(token)
+
+    assert list(auth._revoked_tokens) == tokens[1:]
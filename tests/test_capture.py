@@ -0,0 +1,74 @@
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+from backend import capture, main, tracing
+from backend.auth import create_token
+from backend.capture import pseudonym, sanitize_messages, scrub
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "Trip on 2025-06-01",
+        "from 2025-06-01 2025-06-15",
+        "01/06/2025 to 15/06/2025",
+        "June 1 - 15 2025",
+        "budget 1500000 usd",
+    ],
+)
+def test_scrub_keeps_dates_and_amounts(text):
+    assert scrub(text) == text
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        ("call +1 (555) 123-4567 now", "call <phone> now"),
+        ("ph 555.123.4567.", "ph <phone>."),
+        ("9876543210", "<phone>"),
+        ("mail me at jane.doe+trip@example.co.uk", "mail me at <email>"),
+    ],
+)
+def test_scrub_removes_contact_details(text, expected):
+    assert scrub(text) == expected
+
+
+def test_sanitize_messages_scrubs_content_only():
+    messages = [
+        {"role": "user", "content": "I'm a@b.com", "timestamp": "2025-06-01"},
+        {"role": "assistant"},
+    ]
+
+    assert sanitize_messages(messages) == [
+        {"role": "user", "content": "I'm <email>", "timestamp": "2025-06-01"},
+        {"role": "assistant"},
+    ]
+    assert messages[0]["content"] == "I'm a@b.com"
+    assert sanitize_messages(None) == []
+
+
+def test_pseudonym_is_stable_and_hides_the_username():
+    assert pseudonym("alice") == pseudonym("alice")
+    assert pseudonym("alice") != pseudonym("bob")
+    assert "alice" not in pseudonym("alice")
+
+
+def test_captured_latency_matches_server_timing(tmp_path, monkeypatch):
+    path = tmp_path / "capture.jsonl"
+    monkeypatch.setattr(capture, "CAPTURE_FILE", str(path))
+    monkeypatch.setattr(main, "get_user_chats", lambda username: [{"id": 1}])
+    token = create_token("alice")["access_token"]
+
+    response = TestClient(main.app).get(
+        "/chats/alice", headers={"Authorization": f"Bearer {token}"}
+    )
+    tracing.jsonl_writer.flush()
+
+    [entry] = [json.loads(line) for line in path.read_text().splitlines()]
+    assert entry["endpoint"] == "/chats/{username}"
+    assert entry["payload"] == {"username": pseudonym("alice")}
+    assert entry["output"] == {"chats": 1}
+    assert entry["request_id"] == response.headers["X-Request-ID"]
+    assert response.headers["Server-Timing"] == f"app;dur={entry['latency_ms']:.2f}"
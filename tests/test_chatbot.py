@@ -0,0 +1,46 @@
+import threading
+import time
+
+from backend import chatbot
+
+
+class RecordingPool:
+    def __init__(self):
+        self.calls = []
+
+    def chat(self, key, hedge=False, **kwargs):
+        time.sleep(0.005)  # let concurrent requests interleave
+        self.calls.append((key, kwargs["messages"]))
+        return {"message": {"content": "ok"}}
+
+
+def test_concurrent_requests_of_one_user_keep_their_own_history(monkeypatch):
+    pool = RecordingPool()
+    monkeypatch.setattr(chatbot, "pool", pool)
+
+    def send(i):
+        history = [{"role": "user", "content": f"req{i}"} for _ in range(50)]
+        chatbot.generate_response("alice", f"req{i}", history)
+
+    threads = [threading.Thread(target=send, args=(i,)) for i in range(20)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(pool.calls) == 20
+    for _, messages in pool.calls:
+        # Everything after the system prompt comes from a single request
+        assert len({m["content"] for m in messages[1:]}) == 1
+        assert len(messages) == 52
+
+
+def test_affinity_is_keyed_on_the_chat(monkeypatch):
+    pool = RecordingPool()
+    monkeypatch.setattr(chatbot, "pool", pool)
+
+    chatbot.generate_response("alice", "hi", chat_id=7)
+    chatbot.generate_response("alice", "hi", chat_id=8)
+    chatbot.generate_response("alice", "hi")
+
+    assert [key for key, _ in pool.calls] == ["alice:7", "alice:8", "alice:new"]
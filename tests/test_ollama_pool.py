@@ -0,0 +1,130 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import ollama
+import pytest
+
+from backend.ollama_pool import OllamaPool, parse_host
+
+MESSAGES = [{"role": "user", "content": "hi"}]
+
+
+def served_by(response) -> str:
+    # The fake replies with "[fake-ollama:<port>] ..."
+    return response["message"]["content"].split("]")[0].split(":")[1]
+
+
+def port(host: str) -> str:
+    return host.rsplit(":", 1)[1]
+
+
+def test_concurrent_chats_spread_across_endpoints(fake_ollama):
+    hosts = [fake_ollama(delay=0.3), fake_ollama(delay=0.3)]
+    pool = OllamaPool(hosts)
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        responses = list(
+            executor.map(
+                lambda i: pool.chat(f"chat-{i}", model="llama2", messages=MESSAGES),
+                range(4),
+            )
+        )
+
+    assert {served_by(r) for r in responses} == {port(h) for h in hosts}
+
+
+def test_chat_sticks_to_its_endpoint(fake_ollama):
+    pool = OllamaPool([fake_ollama(), fake_ollama()])
+    first = served_by(pool.chat("chat", model="llama2", messages=MESSAGES))
+    for _ in range(3):
+        assert served_by(pool.chat("chat", model="llama2", messages=MESSAGES)) == first
+
+
+def test_failed_endpoint_is_retried_elsewhere_and_ejected(fake_ollama):
+    failing, healthy = fake_ollama(fail_rate=1.0), fake_ollama()
+    pool = OllamaPool([failing, healthy], eject_seconds=60)
+
+    response = pool.chat("chat", model="llama2", messages=MESSAGES)
+
+    assert served_by(response) == port(healthy)
+    status = {s["host"]: s for s in pool.status()}
+    assert not status[failing]["available"]
+
+    # /api/tags still answers, but that must not end the ejection
+    pool.check_health()
+    status = {s["host"]: s for s in pool.status()}
+    assert status[failing]["healthy"]
+    assert not status[failing]["available"]
+
+
+def test_client_errors_do_not_eject(fake_ollama):
+    pool = OllamaPool([fake_ollama(), fake_ollama()])
+
+    with pytest.raises(ollama.ResponseError):
+        pool.chat("chat", model="missing", messages=MESSAGES)
+
+    assert all(s["available"] for s in pool.status())
+
+
+def test_hedge_beats_slow_endpoint(fake_ollama):
+    slow, fast = fake_ollama(delay=3), fake_ollama()
+    pool = OllamaPool([slow, fast], hedge_delay=0.2)
+
+    start = time.monotonic()
+    response = pool.chat("chat", hedge=True, model="llama2", messages=MESSAGES)
+
+    assert served_by(response) == port(fast)
+    assert time.monotonic() - start < 1.5
+
+
+def test_hosts_can_set_their_own_timeout():
+    assert parse_host("http://a:11434=60", 120) == ("http://a:11434", 60.0)
+    assert parse_host(" http://b:11434 ", 120) == ("http://b:11434", 120)
+
+    pool = OllamaPool(["http://a:11434=5", "http://b:11434"], timeout=30)
+    assert [(s["host"], s["timeout"]) for s in pool.status()] == [
+        ("http://a:11434", 5.0),
+        ("http://b:11434", 30),
+    ]
+
+
+def test_endpoint_timeout_counts_as_a_failure(fake_ollama):
+    slow, fast = fake_ollama(delay=2), fake_ollama()
+    pool = OllamaPool([f"{slow}=0.3", fast])
+
+    response = pool.chat("chat", model="llama2", messages=MESSAGES)
+
+    assert served_by(response) == port(fast)
+    assert not pool.status()[0]["available"]
+
+
+def test_hedge_timer_starts_once_the_call_runs(fake_ollama):
+    blocker, primary, spare = fake_ollama(delay=0.9), fake_ollama(0.3), fake_ollama()
+    pool = OllamaPool([blocker, primary, spare], hedge_delay=0.5, max_concurrency=1)
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        # Occupies the only worker, so the next call waits about 0.9 s for it
+        executor.submit(pool.chat, "other", model="llama2", messages=MESSAGES)
+        time.sleep(0.05)
+        response = pool.chat("chat", hedge=True, model="llama2", messages=MESSAGES)
+
+    # Answering 0.3 s after it started running is within the hedge delay,
+    # so no hedge may be sent even though the call waited longer than that
+    assert served_by(response) == port(primary)
+    time.sleep(0.2)
+    assert fake_ollama.chats[spare] == 0
+
+
+def test_host_without_the_model_is_skipped(fake_ollama):
+    lacking, serving = fake_ollama(models=("mistral",)), fake_ollama()
+    pool = OllamaPool([lacking, serving])
+
+    # Before any health check the pool only learns it from the 404
+    response = pool.chat("chat", model="llama2", messages=MESSAGES)
+    assert served_by(response) == port(serving)
+    assert all(s["available"] for s in pool.status())
+
+    pool.check_health()
+    for i in range(3):
+        pool.chat(f"chat-{i}", model="llama2", messages=MESSAGES)
+    assert fake_ollama.chats[lacking] == 1
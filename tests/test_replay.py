@@ -0,0 +1,126 @@
+import json
+import socket
+import threading
+import time
+
+import pytest
+import requests
+import uvicorn
+
+from backend import chatbot, main, replay
+from backend.fake_ollama import load_recorded
+from backend.ollama_pool import OllamaPool
+
+
+def chat_record(ts, chat_id, new_chat_id, message, response):
+    return {
+        "ts": ts,
+        "request_id": f"rec{ts}",
+        "endpoint": "/chat",
+        "payload": {
+            "username": "user-replay01",
+            "chat_id": chat_id,
+            "message": message,
+            "title": None,
+            "messages": [],
+        },
+        "latency_ms": 10.0,
+        "stages": {},
+        "output": {"response": response, "chat_id": new_chat_id},
+    }
+
+
+RECORDS = [
+    chat_record(1, None, 7, "Paris", "Paris is lovely"),
+    chat_record(2, 7, 7, "In May", "May works"),
+    chat_record(3, None, 9, "Rome", "Rome it is"),
+    chat_record(4, 9, 9, "In June", "June works"),
+    {
+        "ts": 5,
+        "request_id": "rec5",
+        "endpoint": "/chats/{username}",
+        "payload": {"username": "user-replay01"},
+        "latency_ms": 2.0,
+        "stages": {},
+        "output": {"chats": 2},
+    },
+]
+
+
+@pytest.fixture
+def capture_file(tmp_path):
+    path = tmp_path / "capture.jsonl"
+    path.write_text("".join(json.dumps(r) + "\n" for r in RECORDS))
+    return path
+
+
+@pytest.fixture
+def backend_url(tmp_path, monkeypatch, fake_ollama, capture_file):
+    """The real app on a free port, backed by a fake Ollama serving the recording."""
+    monkeypatch.chdir(tmp_path)  # keeps travel_planner.db out of the repo
+    host = fake_ollama(recorded=load_recorded(str(capture_file)))
+    monkeypatch.setattr(chatbot, "pool", OllamaPool([host]))
+
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    server = uvicorn.Server(
+        uvicorn.Config(main.app, host="127.0.0.1", port=port, log_level="warning")
+    )
+    server.install_signal_handlers = lambda: None
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.01)
+    yield f"http://127.0.0.1:{port}"
+    server.should_exit = True
+    thread.join()
+
+
+def test_percentile():
+    assert replay.percentile([], 50) is None
+    assert replay.percentile([3.0], 99) == 3.0
+    values = [float(v) for v in range(10, 0, -1)]
+    assert replay.percentile(values, 50) == 5.0
+    assert replay.percentile(values, 90) == 9.0
+    assert replay.percentile(values, 99) == 10.0
+
+
+def test_server_ms_reads_the_app_metric():
+    response = requests.Response()
+    response.headers["Server-Timing"] = "db;dur=1.5, app;dur=12.34"
+    assert replay.server_ms(response) == 12.34
+
+    assert replay.server_ms(requests.Response()) is None
+
+
+def test_load_recorded_keeps_replies_in_order(tmp_path):
+    path = tmp_path / "capture.jsonl"
+    records = RECORDS + [chat_record(6, 7, 7, "Paris", "Paris again")]
+    path.write_text("\n".join(json.dumps(r) for r in records) + "\n\n")
+
+    recorded = load_recorded(str(path))
+
+    assert list(recorded["Paris"]) == ["Paris is lovely", "Paris again"]
+    assert list(recorded["Rome"]) == ["Rome it is"]
+    assert len(recorded) == 4  # /chats entries carry no reply
+
+
+def test_replay_maps_recorded_chats_onto_new_ones(backend_url, capture_file):
+    records = replay.load_records(str(capture_file))
+
+    results = replay.replay(backend_url, records, speed=0)
+
+    assert [r["status"] for r in results] == [200] * 5
+    chat_ids = [r["replay_output"]["chat_id"] for r in results[:4]]
+    # Follow-ups land in the chat the replay created, not recorded ids 7 and 9
+    assert chat_ids[0] == chat_ids[1]
+    assert chat_ids[2] == chat_ids[3]
+    assert chat_ids[0] != chat_ids[2]
+    assert results[4]["replay_output"] == {"chats": 2}
+    for result in results[:4]:
+        assert result["replay_output"]["response"] == (
+            result["recorded_output"]["response"]
+        )
+        assert result["replay_ms"] is not None
+        assert result["round_trip_ms"] >= result["replay_ms"]
@@ -0,0 +1,125 @@
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+from backend import main, tracing
+from backend.auth import create_token
+
+
+@pytest.fixture
+def client():
+    return TestClient(main.app, raise_server_exceptions=False)
+
+
+@pytest.fixture
+def auth_headers():
+    token = create_token("alice")["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+
+@pytest.fixture
+def slow_log(tmp_path, monkeypatch):
+    path = tmp_path / "slow.log"
+    monkeypatch.setattr(tracing, "SLOW_REQUEST_LOG", str(path))
+    monkeypatch.setattr(tracing, "SLOW_REQUEST_MS", 0)
+
+    def entries():
+        tracing.jsonl_writer.flush()
+        return [json.loads(line) for line in path.read_text().splitlines()]
+
+    return entries
+
+
+def test_failed_requests_reach_the_slow_log(
+    client, auth_headers, slow_log, monkeypatch
+):
+    def broken(username):
+        raise RuntimeError("database is gone")
+
+    monkeypatch.setattr(main, "get_user_chats", broken)
+
+    response = client.get(
+        "/chats/alice", headers={**auth_headers, "X-Request-ID": "broken"}
+    )
+
+    assert response.status_code == 500
+    [entry] = slow_log()
+    assert entry["request_id"] == "broken"
+    assert entry["status"] == 500
+    assert "verify_token" in entry["stages"]
+
+
+def test_spans_are_recorded_on_the_current_trace():
+    trace = tracing.Trace("req", "GET", "/")
+    token = tracing.current_trace.set(trace)
+    try:
+        with tracing.span("db"):
+            pass
+        with tracing.span("ollama"):
+            pass
+        with tracing.span("db"):
+            pass
+    finally:
+        tracing.current_trace.reset(token)
+
+    assert [s["name"] for s in trace.spans] == ["db", "ollama", "db"]
+    breakdown = trace.breakdown()
+    assert set(breakdown) == {"db", "ollama"}
+    assert breakdown["db"] == pytest.approx(
+        trace.spans[0]["duration_ms"] + trace.spans[2]["duration_ms"], abs=0.02
+    )
+
+
+def test_span_outside_a_request_is_a_no_op():
+    with tracing.span("db"):
+        pass
+    assert tracing.current_trace.get() is None
+
+
+def test_profile_toggle_hands_out_the_armed_number_of_turns():
+    toggle = tracing.ProfileToggle()
+    assert toggle.claim() is None
+
+    toggle.arm(2, "sample")
+    assert [toggle.claim(), toggle.claim(), toggle.claim()] == [
+        "sample",
+        "sample",
+        None,
+    ]
+
+    with pytest.raises(ValueError):
+        toggle.arm(1, "perf")
+
+
+def test_middleware_sets_request_id_and_server_timing(client, auth_headers):
+    response = client.post(
+        "/verify", headers={**auth_headers, "X-Request-ID": "from-client_1"}
+    )
+    assert response.status_code == 200
+    assert response.headers["X-Request-ID"] == "from-client_1"
+    name, duration = response.headers["Server-Timing"].split(";dur=")
+    assert name == "app" and float(duration) >= 0
+
+
+def test_middleware_replaces_unsafe_request_ids(client, auth_headers):
+    response = client.post(
+        "/verify", headers={**auth_headers, "X-Request-ID": "../../etc/passwd"}
+    )
+    request_id = response.headers["X-Request-ID"]
+    assert request_id != "../../etc/passwd"
+    assert request_id.isalnum()
+
+
+def test_profiles_with_a_repeated_request_id_are_kept(
+    client, auth_headers, tmp_path, monkeypatch
+):
+    monkeypatch.setattr(tracing, "PROFILE_DIR", str(tmp_path))
+    tracing.profiling.arm(2, "cprofile")
+
+    for _ in range(2):
+        client.post("/verify", headers={**auth_headers, "X-Request-ID": "same"})
+
+    profiles = sorted(p.name for p in tmp_path.iterdir())
+    assert len(profiles) == 2
+    assert all(p.startswith("same-") and p.endswith(".prof") for p in profiles)